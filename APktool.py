@@ -6,14 +6,27 @@ Integrates with Gemini CLI for AI-powered APK reverse engineering workflows.
 """
 
 import asyncio
+import collections
+import contextlib
+import functools
+import hashlib
+import itertools
 import json
+import mmap
+import multiprocessing
 import os
+import re
 import subprocess
-import tempfile
+import threading
+import time
 import shutil
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 import logging
+import xml.etree.ElementTree as ET
 
 from mcp.server import Server
 from mcp.types import (
@@ -31,22 +44,416 @@ from mcp.types import (
     ReadResourceResult,
 )
 
+try:
+    # Optional: uses io_uring/libaio through caio where available
+    from aiofile import async_open
+except ImportError:
+    async_open = None
+
+try:
+    # Optional: SIMD multi-pattern matching for smali searches
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("apktool-mcp")
 
+# Number of smali files handed to a worker process per task
+SMALI_BATCH_SIZE = 64
+# Maximum number of smali matches returned to the client
+MAX_SMALI_MATCHES = 50
+# Bytes of subprocess output kept when only the tail is needed
+MAX_OUTPUT_TAIL = 64 * 1024
+# Resource files at least this large are memory-mapped instead of read
+MMAP_MIN_SIZE = 64 * 1024
+# Maximum number of parsed manifests kept in memory
+MANIFEST_CACHE_SIZE = 32
+
+# Persistent per-user cache (apktool probe results, JVM class data archive, decoded APKs)
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", "~/.cache")).expanduser() / "apktool-mcp"
+# Written into each decoded directory to recognise an unchanged APK
+DECODE_MARKER = ".apktool-mcp.json"
+
+ANDROID_NAME = "{http://schemas.android.com/apk/res/android}name"
+PERMISSION_TAGS = {"uses-permission", "uses-permission-sdk-23"}
+COMPONENT_TAGS = {"activity": "activities", "service": "services", "receiver": "receivers"}
+
+# Tool and prompt listings never change, so build them once at import time
+TOOLS = [
+    Tool(
+        name="decode_apk",
+        description="Decompile an APK file to extract resources, manifest, and smali code",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "apk_path": {"type": "string", "description": "Path to the APK file"},
+                "output_dir": {"type": "string", "description": "Output directory name (optional)"},
+                "force": {"type": "boolean", "description": "Force overwrite existing directory", "default": False},
+                "no_res": {"type": "boolean", "description": "Do not decode resources", "default": False},
+                "no_src": {"type": "boolean", "description": "Do not decode sources", "default": False}
+            },
+            "required": ["apk_path"]
+        }
+    ),
+    Tool(
+        name="build_apk",
+        description="Recompile/build an APK from decompiled source directory",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "source_dir": {"type": "string", "description": "Path to decompiled APK directory"},
+                "output_apk": {"type": "string", "description": "Output APK filename (optional)"},
+                "force": {"type": "boolean", "description": "Force build all files", "default": False}
+            },
+            "required": ["source_dir"]
+        }
+    ),
+    Tool(
+        name="install_framework",
+        description="Install framework APK for system app decompilation",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "framework_path": {"type": "string", "description": "Path to framework APK file"},
+                "tag": {"type": "string", "description": "Tag for framework identification (optional)"}
+            },
+            "required": ["framework_path"]
+        }
+    ),
+    Tool(
+        name="analyze_manifest",
+        description="Analyze AndroidManifest.xml from a decompiled APK",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "apk_dir": {"type": "string", "description": "Path to decompiled APK directory"},
+                "include_full": {"type": "boolean", "description": "Append the full manifest XML to the analysis", "default": False}
+            },
+            "required": ["apk_dir"]
+        }
+    ),
+    Tool(
+        name="extract_strings",
+        description="Extract all string resources from a decompiled APK",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "apk_dir": {"type": "string", "description": "Path to decompiled APK directory"},
+                "locale": {"type": "string", "description": "Specific locale (e.g., 'en', 'es')", "default": ""}
+            },
+            "required": ["apk_dir"]
+        }
+    ),
+    Tool(
+        name="list_permissions",
+        description="List all permissions requested by an APK",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "apk_dir": {"type": "string", "description": "Path to decompiled APK directory"}
+            },
+            "required": ["apk_dir"]
+        }
+    ),
+    Tool(
+        name="find_smali_references",
+        description="Search for specific patterns in smali code",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "apk_dir": {"type": "string", "description": "Path to decompiled APK directory"},
+                "pattern": {"type": "string", "description": "Search pattern or string"},
+                "patterns": {"type": "array", "items": {"type": "string"}, "description": "Several patterns to search for in a single pass"},
+                "case_sensitive": {"type": "boolean", "description": "Case sensitive search", "default": True}
+            },
+            "required": ["apk_dir"]
+        }
+    ),
+    Tool(
+        name="get_apk_info",
+        description="Get basic information about an APK file using aapt",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "apk_path": {"type": "string", "description": "Path to the APK file"}
+            },
+            "required": ["apk_path"]
+        }
+    )
+]
+
+PROMPTS = [
+    Prompt(
+        name="analyze_security",
+        description="Analyze APK for potential security issues",
+        arguments=[
+            {"name": "apk_path", "description": "Path to APK file", "required": True}
+        ]
+    ),
+    Prompt(
+        name="privacy_audit",
+        description="Audit APK for privacy-related permissions and data collection",
+        arguments=[
+            {"name": "apk_path", "description": "Path to APK file", "required": True}
+        ]
+    ),
+    Prompt(
+        name="reverse_engineer_guide",
+        description="Step-by-step guide for reverse engineering an APK",
+        arguments=[
+            {"name": "apk_path", "description": "Path to APK file", "required": True},
+            {"name": "target_feature", "description": "Specific feature to analyze", "required": False}
+        ]
+    )
+]
+
+LIST_TOOLS_RESULT = ListToolsResult(tools=TOOLS)
+LIST_PROMPTS_RESULT = ListPromptsResult(prompts=PROMPTS)
+
+
+async def _aread(path: Path) -> bytes:
+    """Read a file without blocking the event loop"""
+    if async_open is not None:
+        async with async_open(path, 'rb') as f:
+            return await f.read()
+    
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, path.read_bytes)
+
+
+def _read_mapped(path: Path, offset: int = 0, length: Optional[int] = None) -> bytes:
+    """Read a byte range of a file through a read-only memory map"""
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        end = len(mm) if length is None else offset + length
+        return mm[offset:end]
+
+
+def _parse_range(query: str) -> Tuple[int, Optional[int]]:
+    """Byte range selected by an optional offset=N&length=N resource query"""
+    params = parse_qs(query)
+    offset = int(params.get("offset", ["0"])[0])
+    length = int(params["length"][0]) if "length" in params else None
+    if offset < 0 or (length is not None and length < 0):
+        raise ValueError("offset and length must be non-negative")
+    return offset, length
+
+
+async def _read_range(path: Path, offset: int = 0, length: Optional[int] = None) -> str:
+    """Read a text file, or a byte range of it, without blocking the event loop"""
+    if path.stat().st_size < MMAP_MIN_SIZE:
+        data = await _aread(path)
+        data = data[offset:] if length is None else data[offset:offset + length]
+    else:
+        loop = asyncio.get_running_loop()
+        data = await loop.run_in_executor(None, _read_mapped, path, offset, length)
+    
+    # A range may split a multi-byte character at either end
+    return data.decode('utf-8', errors='replace')
+
+
+def _fingerprint(*paths: str) -> str:
+    """Identify installed binaries by path and modification time"""
+    digest = hashlib.sha1()
+    for path in paths:
+        digest.update(path.encode() + str(os.stat(path).st_mtime_ns).encode())
+    return digest.hexdigest()
+
+
+def _java_major_version(java_bin: str) -> int:
+    """Major version of a java binary (0 if unknown), cached next to the apktool probe"""
+    stamp = CACHE_DIR / f"java-{_fingerprint(java_bin)}"
+    try:
+        return int(stamp.read_text())
+    except (OSError, ValueError):
+        pass
+    
+    try:
+        process = subprocess.run([java_bin, "-version"], capture_output=True, timeout=30)
+    except (OSError, subprocess.SubprocessError):
+        return 0
+    
+    # e.g. 'openjdk version "17.0.2"' or 'java version "1.8.0_292"'
+    match = re.search(rb'version "(\d+)(?:\.(\d+))?', process.stderr)
+    if not match:
+        return 0
+    major = int(match.group(1))
+    if major == 1 and match.group(2):
+        major = int(match.group(2))
+    
+    try:
+        stamp.parent.mkdir(parents=True, exist_ok=True)
+        stamp.write_text(str(major))
+    except OSError as e:
+        logger.debug(f"Could not cache java probe: {e}")
+    
+    return major
+
+
+def _file_digest(path: Path) -> str:
+    """Hash a file's content in fixed-size chunks"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _iter_smali(root: str) -> Iterator[str]:
+    """Yield paths of all smali files below root"""
+    # DirEntry type checks reuse d_type from the directory listing, no extra stat calls
+    stack = [root]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.endswith('.smali'):
+                        yield entry.path
+        except OSError:
+            continue
+
+
+@functools.lru_cache(maxsize=16)
+def _hs_database(patterns: Tuple[str, ...], case_sensitive: bool):
+    """Compile literal patterns into one Hyperscan database (cached per worker process)"""
+    flags = 0 if case_sensitive else hyperscan.HS_FLAG_CASELESS
+    db = hyperscan.Database()
+    db.compile(
+        expressions=[re.escape(p).encode('utf-8') for p in patterns],
+        ids=list(range(len(patterns))),
+        elements=len(patterns),
+        flags=[flags] * len(patterns)
+    )
+    return db
+
+
+def _hs_hits(db, data, limit: int) -> List[int]:
+    """Offsets of the last byte of the first Hyperscan match on each of up to limit lines"""
+    hits = []
+    line_end = -1
+    
+    def on_match(pattern_id, start, end, flags, context):
+        nonlocal line_end
+        pos = end - 1
+        if pos <= line_end:
+            return False
+        hits.append(pos)
+        line_end = data.find(b'\n', pos)
+        if line_end == -1:
+            line_end = len(data)
+        # A truthy return value stops the scan
+        return len(hits) >= limit
+    
+    try:
+        db.scan(data, match_event_handler=on_match)
+    except hyperscan.ScanTerminated:
+        pass
+    return hits
+
+
+def _matching_lines(data, regex, db, limit: int) -> List[Tuple[int, str]]:
+    """Line numbers and text of up to limit lines of data that contain a match"""
+    # Runs as its own frame so the match iterator releases the buffer on return
+    hits = _hs_hits(db, data, limit) if db is not None else (match.start() for match in regex.finditer(data))
+    lines = []
+    line_no, counted, line_end = 1, 0, -1
+    
+    for pos in hits:
+        # Report each line once, even with several hits on it
+        if pos <= line_end:
+            continue
+        
+        # Count newlines lazily, only up to each hit
+        line_no += data[counted:pos].count(b'\n')
+        line_start = data.rfind(b'\n', 0, pos) + 1
+        line_end = data.find(b'\n', pos)
+        if line_end == -1:
+            line_end = len(data)
+        
+        lines.append((line_no, data[line_start:line_end].strip().decode('utf-8', errors='ignore')))
+        if len(lines) >= limit:
+            break
+        
+        counted = line_start
+    
+    return lines
+
+
+def _scan_files(paths: List[str], root: str, patterns: List[str], case_sensitive: bool = True,
+                max_matches: int = MAX_SMALI_MATCHES) -> List[Tuple[str, int, str]]:
+    """Scan a batch of smali files for any of the patterns (runs in a worker process)"""
+    db = regex = None
+    if hyperscan is not None:
+        db = _hs_database(tuple(patterns), case_sensitive)
+    else:
+        # Alternation of escaped literals still matches all patterns in one pass
+        regex = re.compile(b'|'.join(re.escape(p.encode('utf-8')) for p in patterns),
+                           0 if case_sensitive else re.IGNORECASE)
+    results = []
+    
+    for path in paths:
+        try:
+            with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                lines = _matching_lines(mm, regex, db, max_matches - len(results))
+        except (OSError, ValueError):
+            # ValueError: empty files cannot be memory-mapped
+            continue
+        
+        if lines:
+            relpath = os.path.relpath(path, root)
+            results.extend((relpath, line_no, line) for line_no, line in lines)
+            if len(results) >= max_matches:
+                break
+    
+    return results
+
+
 class ApktoolMCPServer:
-    def __init__(self, apktool_path: str = "apktool", work_dir: str = None):
+    def __init__(self, apktool_path: str = "apktool", work_dir: str = None,
+                 jobs: int = None, max_commands: int = None, jvm_class_cache: bool = True,
+                 launch_interval: float = 0.2, cache_days: float = 0):
         """
         Initialize the Apktool MCP Server
         
         Args:
             apktool_path: Path to apktool executable (default: "apktool")
-            work_dir: Working directory for APK operations (default: temp dir)
+            work_dir: Working directory for APK operations
+                (default: $APKTOOL_WORK_DIR or ~/.cache/apktool-mcp/work)
+            jobs: Worker processes used for smali scanning (default: CPU count)
+            max_commands: Maximum concurrent apktool processes
+                (default: $APKTOOL_MCP_MAX_COMMANDS or half the CPU count, at least 2)
+            jvm_class_cache: Share a class data archive between apktool JVM launches (JDK 19+)
+            launch_interval: Minimum seconds between apktool launches (default: 0.2)
+            cache_days: On startup, remove decoded APKs whose last decode_apk call is older
+                than this many days (default: 0, never remove)
         """
         self.apktool_path = apktool_path
-        self.work_dir = Path(work_dir) if work_dir else Path(tempfile.mkdtemp())
-        self.work_dir.mkdir(exist_ok=True)
+        work_dir = work_dir or os.environ.get("APKTOOL_WORK_DIR")
+        self.work_dir = Path(work_dir).expanduser() if work_dir else CACHE_DIR / "work"
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        self.cache_days = cache_days
+        self._jobs = jobs or os.cpu_count() or 1
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._rg = shutil.which("rg")
+        self._aapt = shutil.which("aapt") or shutil.which("aapt2")
+        self._apktool_bin = shutil.which(self.apktool_path)
+        
+        if not max_commands:
+            max_commands = int(os.environ.get("APKTOOL_MCP_MAX_COMMANDS", max(2, (os.cpu_count() or 4) // 2)))
+        self._proc_sem = asyncio.BoundedSemaphore(max_commands)
+        self._jvm_class_cache = jvm_class_cache
+        self._class_archive_probe: Optional[asyncio.Future] = None
+        self._dumping_archive = False
+        self._launch_interval = launch_interval
+        self._launch_lock = asyncio.Lock()
+        self._last_launch = 0.0
+        self._manifest_cache: Dict[Path, Tuple[int, int, Dict[str, Any]]] = {}
+        # Manifests are parsed on executor threads
+        self._manifest_lock = threading.Lock()
+        self._res_cache: Optional[Tuple[int, ListResourcesResult]] = None
         
         # Initialize MCP server
         self.server = Server("apktool-mcp")
@@ -59,108 +466,7 @@ class ApktoolMCPServer:
         
         @self.server.list_tools()
         async def list_tools() -> ListToolsResult:
-            return ListToolsResult(
-                tools=[
-                    Tool(
-                        name="decode_apk",
-                        description="Decompile an APK file to extract resources, manifest, and smali code",
-                        inputSchema={
-                            "type": "object",
-                            "properties": {
-                                "apk_path": {"type": "string", "description": "Path to the APK file"},
-                                "output_dir": {"type": "string", "description": "Output directory name (optional)"},
-                                "force": {"type": "boolean", "description": "Force overwrite existing directory", "default": False},
-                                "no_res": {"type": "boolean", "description": "Do not decode resources", "default": False},
-                                "no_src": {"type": "boolean", "description": "Do not decode sources", "default": False}
-                            },
-                            "required": ["apk_path"]
-                        }
-                    ),
-                    Tool(
-                        name="build_apk",
-                        description="Recompile/build an APK from decompiled source directory",
-                        inputSchema={
-                            "type": "object",
-                            "properties": {
-                                "source_dir": {"type": "string", "description": "Path to decompiled APK directory"},
-                                "output_apk": {"type": "string", "description": "Output APK filename (optional)"},
-                                "force": {"type": "boolean", "description": "Force build all files", "default": False}
-                            },
-                            "required": ["source_dir"]
-                        }
-                    ),
-                    Tool(
-                        name="install_framework",
-                        description="Install framework APK for system app decompilation",
-                        inputSchema={
-                            "type": "object",
-                            "properties": {
-                                "framework_path": {"type": "string", "description": "Path to framework APK file"},
-                                "tag": {"type": "string", "description": "Tag for framework identification (optional)"}
-                            },
-                            "required": ["framework_path"]
-                        }
-                    ),
-                    Tool(
-                        name="analyze_manifest",
-                        description="Analyze AndroidManifest.xml from a decompiled APK",
-                        inputSchema={
-                            "type": "object",
-                            "properties": {
-                                "apk_dir": {"type": "string", "description": "Path to decompiled APK directory"}
-                            },
-                            "required": ["apk_dir"]
-                        }
-                    ),
-                    Tool(
-                        name="extract_strings",
-                        description="Extract all string resources from a decompiled APK",
-                        inputSchema={
-                            "type": "object",
-                            "properties": {
-                                "apk_dir": {"type": "string", "description": "Path to decompiled APK directory"},
-                                "locale": {"type": "string", "description": "Specific locale (e.g., 'en', 'es')", "default": ""}
-                            },
-                            "required": ["apk_dir"]
-                        }
-                    ),
-                    Tool(
-                        name="list_permissions",
-                        description="List all permissions requested by an APK",
-                        inputSchema={
-                            "type": "object",
-                            "properties": {
-                                "apk_dir": {"type": "string", "description": "Path to decompiled APK directory"}
-                            },
-                            "required": ["apk_dir"]
-                        }
-                    ),
-                    Tool(
-                        name="find_smali_references",
-                        description="Search for specific patterns in smali code",
-                        inputSchema={
-                            "type": "object",
-                            "properties": {
-                                "apk_dir": {"type": "string", "description": "Path to decompiled APK directory"},
-                                "pattern": {"type": "string", "description": "Search pattern or string"},
-                                "case_sensitive": {"type": "boolean", "description": "Case sensitive search", "default": True}
-                            },
-                            "required": ["apk_dir", "pattern"]
-                        }
-                    ),
-                    Tool(
-                        name="get_apk_info",
-                        description="Get basic information about an APK file using aapt",
-                        inputSchema={
-                            "type": "object",
-                            "properties": {
-                                "apk_path": {"type": "string", "description": "Path to the APK file"}
-                            },
-                            "required": ["apk_path"]
-                        }
-                    )
-                ]
-            )
+            return LIST_TOOLS_RESULT
 
         @self.server.call_tool()
         async def call_tool(name: str, arguments: Dict[str, Any]) -> CallToolResult:
@@ -196,49 +502,56 @@ class ApktoolMCPServer:
         
         @self.server.list_resources()
         async def list_resources() -> ListResourcesResult:
+            # Reuse the last listing while the work directory is unchanged
+            mtime = self.work_dir.stat().st_mtime_ns
+            if self._res_cache and self._res_cache[0] == mtime:
+                return self._res_cache[1]
+            
             resources = []
             
             # List all decompiled APK directories
-            for item in self.work_dir.iterdir():
-                if item.is_dir():
-                    resources.append(
-                        Resource(
-                            uri=f"apktool://apk/{item.name}/manifest",
-                            name=f"{item.name} - AndroidManifest.xml",
-                            mimeType="application/xml"
+            with os.scandir(self.work_dir) as it:
+                for item in it:
+                    if item.is_dir():
+                        resources.append(
+                            Resource(
+                                uri=f"apktool://apk/{item.name}/manifest",
+                                name=f"{item.name} - AndroidManifest.xml",
+                                mimeType="application/xml"
+                            )
                         )
-                    )
-                    resources.append(
-                        Resource(
-                            uri=f"apktool://apk/{item.name}/apktool_yml",
-                            name=f"{item.name} - apktool.yml",
-                            mimeType="application/yaml"
+                        resources.append(
+                            Resource(
+                                uri=f"apktool://apk/{item.name}/apktool_yml",
+                                name=f"{item.name} - apktool.yml",
+                                mimeType="application/yaml"
+                            )
                         )
-                    )
             
-            return ListResourcesResult(resources=resources)
+            result = ListResourcesResult(resources=resources)
+            self._res_cache = (mtime, result)
+            return result
 
         @self.server.read_resource()
         async def read_resource(uri: str) -> ReadResourceResult:
             try:
                 if uri.startswith("apktool://apk/"):
-                    parts = uri.split("/")
+                    path, _, query = uri.partition("?")
+                    offset, length = _parse_range(query)
+                    
+                    parts = path.split("/")
                     apk_name = parts[3]
                     resource_type = parts[4]
                     
                     apk_dir = self.work_dir / apk_name
                     
                     if resource_type == "manifest":
-                        manifest_path = apk_dir / "AndroidManifest.xml"
-                        if manifest_path.exists():
-                            content = manifest_path.read_text(encoding='utf-8')
-                            return ReadResourceResult(contents=[TextContent(type="text", text=content)])
+                        content = await _read_range(apk_dir / "AndroidManifest.xml", offset, length)
+                        return ReadResourceResult(contents=[TextContent(type="text", text=content)])
                     
                     elif resource_type == "apktool_yml":
-                        yml_path = apk_dir / "apktool.yml"
-                        if yml_path.exists():
-                            content = yml_path.read_text(encoding='utf-8')
-                            return ReadResourceResult(contents=[TextContent(type="text", text=content)])
+                        content = await _read_range(apk_dir / "apktool.yml", offset, length)
+                        return ReadResourceResult(contents=[TextContent(type="text", text=content)])
                 
                 raise FileNotFoundError(f"Resource not found: {uri}")
                 
@@ -251,32 +564,7 @@ class ApktoolMCPServer:
         
         @self.server.list_prompts()
         async def list_prompts() -> ListPromptsResult:
-            return ListPromptsResult(
-                prompts=[
-                    Prompt(
-                        name="analyze_security",
-                        description="Analyze APK for potential security issues",
-                        arguments=[
-                            {"name": "apk_path", "description": "Path to APK file", "required": True}
-                        ]
-                    ),
-                    Prompt(
-                        name="privacy_audit",
-                        description="Audit APK for privacy-related permissions and data collection",
-                        arguments=[
-                            {"name": "apk_path", "description": "Path to APK file", "required": True}
-                        ]
-                    ),
-                    Prompt(
-                        name="reverse_engineer_guide",
-                        description="Step-by-step guide for reverse engineering an APK",
-                        arguments=[
-                            {"name": "apk_path", "description": "Path to APK file", "required": True},
-                            {"name": "target_feature", "description": "Specific feature to analyze", "required": False}
-                        ]
-                    )
-                ]
-            )
+            return LIST_PROMPTS_RESULT
 
         @self.server.get_prompt()
         async def get_prompt(name: str, arguments: Dict[str, str]) -> GetPromptResult:
@@ -289,7 +577,7 @@ Steps to follow:
 1. Use decode_apk to decompile the APK
 2. Use analyze_manifest to examine permissions and components
 3. Use list_permissions to identify potentially dangerous permissions
-4. Use find_smali_references to search for:
+4. Use find_smali_references with a patterns list to search in one pass for:
    - Crypto/encryption usage
    - Network communications
    - File I/O operations
@@ -358,41 +646,159 @@ Include specific apktool commands and file locations to examine.
                 ]
             )
 
-    async def _run_command(self, cmd: List[str], cwd: Optional[Path] = None) -> str:
-        """Execute a command and return its output"""
+    @staticmethod
+    async def _read_stream(stream: asyncio.StreamReader, capture_all: bool = False,
+                           max_lines: Optional[int] = None, on_limit=None) -> str:
+        """Read a subprocess stream, keeping only its tail unless capture_all is set
+        
+        With max_lines, reading stops after that many lines and on_limit is called.
+        """
+        buf = bytearray()
+        truncated = False
+        lines = 0
+        
+        while True:
+            chunk = await stream.read(MAX_OUTPUT_TAIL)
+            if not chunk:
+                break
+            buf.extend(chunk)
+            
+            if max_lines is not None:
+                lines += chunk.count(b'\n')
+                if lines >= max_lines:
+                    del buf[len(b'\n'.join(buf.split(b'\n')[:max_lines])):]
+                    on_limit()
+                    break
+            
+            if not capture_all and len(buf) > MAX_OUTPUT_TAIL:
+                del buf[:len(buf) - MAX_OUTPUT_TAIL]
+                truncated = True
+        
+        output = buf.decode('utf-8', errors='ignore')
+        return f"... (output truncated)\n{output}" if truncated else output
+
+    def _class_archive(self) -> Optional[Path]:
+        """Class data archive shared by apktool JVMs, or None when it cannot be used"""
+        java_bin = shutil.which("java")
+        if not self._apktool_bin or not java_bin:
+            return None
+        
+        # JDK 12-18 honour SharedArchiveFile but cannot create it, which would
+        # disable class data sharing altogether instead of speeding it up
+        if _java_major_version(java_bin) < 19:
+            return None
+        
         try:
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=cwd or self.work_dir
-            )
-            stdout, stderr = await process.communicate()
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        except OSError:
+            return None
+        return CACHE_DIR / f"apktool-{_fingerprint(self._apktool_bin, java_bin)}.jsa"
+
+    async def _apktool_env(self) -> Tuple[Optional[Dict[str, str]], bool]:
+        """Environment for the next apktool launch, and whether that launch dumps the archive"""
+        if not self._jvm_class_cache:
+            return None, False
+        
+        # Probing java starts a JVM of its own, so it waits for the first apktool launch
+        if self._class_archive_probe is None:
+            self._class_archive_probe = asyncio.get_running_loop().run_in_executor(None, self._class_archive)
+        archive = await self._class_archive_probe
+        if archive is None:
+            return None, False
+        
+        # An existing archive is still launched with AutoCreateSharedArchive so the
+        # JVM regenerates it when it no longer matches the apktool jar
+        options = f"-XX:+AutoCreateSharedArchive -XX:SharedArchiveFile={archive}"
+        if archive.exists():
+            dumping = False
+        elif not self._dumping_archive:
+            # Only one JVM creates the archive; concurrent dumps would overwrite each other
+            dumping = True
+            self._dumping_archive = True
+        else:
+            return None, False
+        
+        env = dict(os.environ)
+        env["JDK_JAVA_OPTIONS"] = f"{env['JDK_JAVA_OPTIONS']} {options}" if env.get("JDK_JAVA_OPTIONS") else options
+        return env, dumping
+
+    async def _wait_launch_slot(self):
+        """Space out apktool launches so bursts of calls do not start their JVMs together"""
+        # Only the spacing is serialized; the lock is released before the process runs
+        async with self._launch_lock:
+            delay = self._launch_interval - (time.monotonic() - self._last_launch)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._last_launch = time.monotonic()
+
+    async def _run_command(self, cmd: List[str], cwd: Optional[Path] = None,
+                           ok_returncodes: Tuple[int, ...] = (0,),
+                           capture_all: bool = False, max_lines: Optional[int] = None) -> str:
+        """Execute a command and return its output (stdout stops after max_lines lines)"""
+        is_apktool = cmd[0] == self.apktool_path
+        env, dumping = (await self._apktool_env()) if is_apktool else (None, False)
+        try:
+            # Each apktool JVM is memory hungry, so bound how many run at once and
+            # space out their starts; ripgrep/aapt are light and launch immediately
+            async with self._proc_sem if is_apktool else contextlib.nullcontext():
+                if is_apktool:
+                    await self._wait_launch_slot()
+                process = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    cwd=cwd or self.work_dir,
+                    env=env
+                )
+                
+                stopped = False
+                def stop():
+                    nonlocal stopped
+                    stopped = True
+                    process.kill()
+                
+                output, error = await asyncio.gather(
+                    self._read_stream(process.stdout, capture_all, max_lines, stop),
+                    self._read_stream(process.stderr, capture_all)
+                )
+                await process.wait()
             
-            output = stdout.decode('utf-8', errors='ignore')
-            error = stderr.decode('utf-8', errors='ignore')
+            if env is not None:
+                # The java launcher announces JDK_JAVA_OPTIONS on every run
+                error = '\n'.join(line for line in error.splitlines()
+                                  if not line.startswith("NOTE: Picked up JDK_JAVA_OPTIONS"))
             
-            if process.returncode != 0:
+            if not stopped and process.returncode not in ok_returncodes:
                 raise RuntimeError(f"Command failed: {' '.join(cmd)}\nError: {error}")
             
             return output if output else error
             
         except Exception as e:
             raise RuntimeError(f"Failed to execute command: {' '.join(cmd)}\nError: {str(e)}")
+        finally:
+            if dumping:
+                self._dumping_archive = False
 
     async def _decode_apk(self, apk_path: str, output_dir: str = None, 
                          force: bool = False, no_res: bool = False, 
                          no_src: bool = False) -> str:
         """Decompile an APK file using apktool"""
         apk_file = Path(apk_path)
-        if not apk_file.exists():
-            raise FileNotFoundError(f"APK file not found: {apk_path}")
         
         if not output_dir:
             output_dir = apk_file.stem
         
         output_path = self.work_dir / output_dir
         
+        loop = asyncio.get_running_loop()
+        options = {"no_res": no_res, "no_src": no_src}
+        if not force:
+            decoded = await loop.run_in_executor(None, self._is_decoded, apk_file, output_path, options)
+            if decoded:
+                return f"APK already decompiled to: {output_path} (unchanged since last decode)"
+            if decoded is False:
+                raise FileExistsError(f"APK changed since last decode to {output_path}; pass force=True to overwrite")
+        
         cmd = [self.apktool_path, "d", str(apk_file)]
         
         if force:
@@ -404,16 +810,74 @@ Include specific apktool commands and file locations to examine.
         
         cmd.extend(["-o", str(output_path)])
         
-        result = await self._run_command(cmd)
+        result = await self._run_command(cmd, capture_all=True)
+        await loop.run_in_executor(None, self._mark_decoded, apk_file, output_path, options)
+        # mtime granularity may hide the new directory from the listing cache
+        self._res_cache = None
         
         return f"Successfully decompiled APK to: {output_path}\n\nOutput:\n{result}"
 
+    def _is_decoded(self, apk_file: Path, output_path: Path, options: Dict[str, bool]) -> Optional[bool]:
+        """Check whether output_path already holds a decode of this exact APK
+        
+        Returns None when output_path carries no marker from this server.
+        """
+        marker_path = output_path / DECODE_MARKER
+        try:
+            marker = json.loads(marker_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+        
+        stat = apk_file.stat()
+        if marker.get("options") != options or marker.get("size") != stat.st_size:
+            return False
+        
+        # Same size but touched since: fall back to comparing content
+        if marker.get("mtime_ns") != stat.st_mtime_ns:
+            if marker.get("digest") != _file_digest(apk_file):
+                return False
+            marker["mtime_ns"] = stat.st_mtime_ns
+            marker_path.write_text(json.dumps(marker), encoding='utf-8')
+        
+        # Record the repeated decode for the optional startup cleanup
+        os.utime(marker_path)
+        return True
+
+    def _mark_decoded(self, apk_file: Path, output_path: Path, options: Dict[str, bool]):
+        """Record which APK output_path was decoded from"""
+        stat = apk_file.stat()
+        marker = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "digest": _file_digest(apk_file),
+            "options": options
+        }
+        (output_path / DECODE_MARKER).write_text(json.dumps(marker), encoding='utf-8')
+
+    def _clean_work_dir(self):
+        """Remove decoded APKs whose last decode_apk call is older than cache_days"""
+        if not self.cache_days:
+            return
+        
+        cutoff = time.time() - self.cache_days * 24 * 3600
+        for item in self.work_dir.iterdir():
+            try:
+                # Only directories decoded by this server carry a marker
+                if (item / DECODE_MARKER).stat().st_mtime >= cutoff:
+                    continue
+            except OSError:
+                continue
+            
+            logger.info(f"Removing stale decoded APK: {item}")
+            try:
+                shutil.rmtree(item)
+            except OSError as e:
+                logger.warning(f"Could not remove {item}: {e}")
+
     async def _build_apk(self, source_dir: str, output_apk: str = None, 
                         force: bool = False) -> str:
         """Build/recompile an APK from source directory"""
         source_path = Path(source_dir)
-        if not source_path.exists():
-            raise FileNotFoundError(f"Source directory not found: {source_dir}")
         
         cmd = [self.apktool_path, "b", str(source_path)]
         
@@ -430,8 +894,6 @@ Include specific apktool commands and file locations to examine.
     async def _install_framework(self, framework_path: str, tag: str = None) -> str:
         """Install framework APK for system app decompilation"""
         framework_file = Path(framework_path)
-        if not framework_file.exists():
-            raise FileNotFoundError(f"Framework file not found: {framework_path}")
         
         cmd = [self.apktool_path, "if", str(framework_file)]
         
@@ -442,39 +904,81 @@ Include specific apktool commands and file locations to examine.
         
         return f"Successfully installed framework: {framework_path}\n\nOutput:\n{result}"
 
-    async def _analyze_manifest(self, apk_dir: str) -> str:
+    def _parse_manifest(self, manifest_path: Path) -> Dict[str, Any]:
+        """Parse AndroidManifest.xml, reusing the cached result while the file is unchanged"""
+        key = manifest_path.resolve()
+        stat = key.stat()
+        
+        with self._manifest_lock:
+            cached = self._manifest_cache.pop(key, None)
+            if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+                self._manifest_cache[key] = cached
+                return cached[2]
+        
+        manifest = {"package": None, "permissions": []}
+        manifest.update({key_name: [] for key_name in COMPONENT_TAGS.values()})
+        
+        try:
+            # Stream the document instead of building the whole tree
+            for event, elem in ET.iterparse(key, events=("start", "end")):
+                if event == "end":
+                    elem.clear()
+                elif elem.tag == "manifest":
+                    manifest["package"] = elem.get("package")
+                elif elem.tag in PERMISSION_TAGS or elem.tag in COMPONENT_TAGS:
+                    name = elem.get(ANDROID_NAME)
+                    if not name:
+                        continue
+                    if elem.tag in PERMISSION_TAGS:
+                        manifest["permissions"].append(name)
+                    else:
+                        manifest[COMPONENT_TAGS[elem.tag]].append(name)
+        except ET.ParseError as e:
+            raise ValueError(f"AndroidManifest.xml is not decoded XML (decoded with no_res?): {e}")
+        
+        with self._manifest_lock:
+            self._manifest_cache[key] = (stat.st_mtime_ns, stat.st_size, manifest)
+            if len(self._manifest_cache) > MANIFEST_CACHE_SIZE:
+                # Evict the least recently used entry
+                del self._manifest_cache[next(iter(self._manifest_cache))]
+        
+        return manifest
+
+    async def _analyze_manifest(self, apk_dir: str, include_full: bool = False) -> str:
         """Analyze AndroidManifest.xml from decompiled APK"""
         manifest_path = Path(apk_dir) / "AndroidManifest.xml"
-        if not manifest_path.exists():
-            raise FileNotFoundError(f"AndroidManifest.xml not found in: {apk_dir}")
         
-        content = manifest_path.read_text(encoding='utf-8')
+        loop = asyncio.get_running_loop()
+        manifest = await loop.run_in_executor(None, self._parse_manifest, manifest_path)
         
         # Extract key information
         analysis = []
-        lines = content.split('\n')
-        
-        for line in lines:
-            line = line.strip()
-            if 'package=' in line:
-                analysis.append(f"Package: {line}")
-            elif 'android:name=' in line and 'activity' in line.lower():
-                analysis.append(f"Activity: {line}")
-            elif 'android:name=' in line and 'service' in line.lower():
-                analysis.append(f"Service: {line}")
-            elif 'android:name=' in line and 'receiver' in line.lower():
-                analysis.append(f"Receiver: {line}")
-            elif 'uses-permission' in line:
-                analysis.append(f"Permission: {line}")
+        if manifest["package"]:
+            analysis.append(f"Package: {manifest['package']}")
+        analysis.extend(f"Activity: {name}" for name in manifest["activities"])
+        analysis.extend(f"Service: {name}" for name in manifest["services"])
+        analysis.extend(f"Receiver: {name}" for name in manifest["receivers"])
+        analysis.extend(f"Permission: {name}" for name in manifest["permissions"])
         
         analysis_text = '\n'.join(analysis) if analysis else "No key elements found"
+        result = f"AndroidManifest.xml Analysis:\n\n{analysis_text}"
         
-        return f"AndroidManifest.xml Analysis:\n\n{analysis_text}\n\nFull content:\n{content}"
+        if include_full:
+            content = (await _aread(manifest_path)).decode('utf-8')
+            return f"{result}\n\nFull content:\n{content}"
+        
+        # Point at the resource instead of inlining the whole document
+        apk_path = Path(apk_dir).resolve()
+        if apk_path.parent == self.work_dir.resolve():
+            return f"{result}\n\nFull manifest available at: apktool://apk/{apk_path.name}/manifest"
+        
+        return f"{result}\n\nUse include_full to get the full manifest content"
 
     async def _extract_strings(self, apk_dir: str, locale: str = "") -> str:
         """Extract string resources from decompiled APK"""
         res_dir = Path(apk_dir) / "res"
-        if not res_dir.exists():
+        # Globbing a missing directory would silently find nothing
+        if not res_dir.is_dir():
             raise FileNotFoundError(f"Resources directory not found: {res_dir}")
         
         strings_files = []
@@ -486,34 +990,38 @@ Include specific apktool commands and file locations to examine.
         if not strings_files:
             return f"No string files found for locale: {locale or 'default'}"
         
-        all_strings = []
-        for strings_file in strings_files:
-            content = strings_file.read_text(encoding='utf-8')
-            all_strings.append(f"\n--- {strings_file.name} ---\n{content}")
+        # Read all files concurrently off the event loop
+        contents = await asyncio.gather(*(_aread(f) for f in strings_files))
+        
+        # Concatenate raw bytes and decode once at the end
+        all_strings = bytearray()
+        for strings_file, content in zip(strings_files, contents):
+            all_strings += b"\n--- " + strings_file.name.encode('utf-8') + b" ---\n"
+            all_strings += content
         
-        return f"Extracted strings from {len(strings_files)} files:\n{''.join(all_strings)}"
+        return f"Extracted strings from {len(strings_files)} files:\n{all_strings.decode('utf-8', errors='replace')}"
 
     async def _list_permissions(self, apk_dir: str) -> str:
         """List all permissions from AndroidManifest.xml"""
         manifest_path = Path(apk_dir) / "AndroidManifest.xml"
-        if not manifest_path.exists():
-            raise FileNotFoundError(f"AndroidManifest.xml not found in: {apk_dir}")
         
-        content = manifest_path.read_text(encoding='utf-8')
-        permissions = []
-        
-        for line in content.split('\n'):
-            if 'uses-permission' in line:
-                permissions.append(line.strip())
+        loop = asyncio.get_running_loop()
+        manifest = await loop.run_in_executor(None, self._parse_manifest, manifest_path)
+        permissions = manifest["permissions"]
         
         if not permissions:
             return "No permissions found in AndroidManifest.xml"
         
         return f"Found {len(permissions)} permissions:\n\n" + '\n'.join(permissions)
 
-    async def _find_smali_references(self, apk_dir: str, pattern: str, 
-                                   case_sensitive: bool = True) -> str:
+    async def _find_smali_references(self, apk_dir: str, pattern: str = None, 
+                                   case_sensitive: bool = True, patterns: List[str] = None) -> str:
         """Search for patterns in smali code"""
+        # Hyperscan rejects empty patterns, and they would match every line anyway
+        patterns = [p for p in [pattern, *(patterns or [])] if p]
+        if not patterns:
+            raise ValueError("Either pattern or patterns is required")
+        
         smali_dirs = []
         apk_path = Path(apk_dir)
         
@@ -525,42 +1033,112 @@ Include specific apktool commands and file locations to examine.
         if not smali_dirs:
             return "No smali directories found"
         
+        if self._rg:
+            matches = await self._rg_smali_references(apk_path, smali_dirs, patterns, case_sensitive)
+        else:
+            matches = await self._scan_smali_references(apk_path, smali_dirs, patterns, case_sensitive)
+        
+        label = "', '".join(patterns)
+        if not matches:
+            return f"Pattern '{label}' not found in smali code"
+        
+        if len(matches) > MAX_SMALI_MATCHES:
+            return f"Found more than {MAX_SMALI_MATCHES} matches for '{label}', showing the first {MAX_SMALI_MATCHES}:\n\n" + \
+                   '\n'.join(matches[:MAX_SMALI_MATCHES])
+        
+        return f"Found {len(matches)} matches for '{label}':\n\n" + '\n'.join(matches)
+
+    async def _scan_smali_references(self, apk_path: Path, smali_dirs: List[Path],
+                                     patterns: List[str], case_sensitive: bool) -> List[str]:
+        """Search smali directories with the process pool"""
+        try:
+            return await self._scan_smali_batches(apk_path, smali_dirs, patterns, case_sensitive)
+        except BrokenProcessPool:
+            # A worker died (OOM killer, signal); start a fresh pool and retry once
+            logger.warning("Smali scan worker pool broke, restarting it")
+            self._pool.shutdown(wait=False)
+            self._pool = None
+            return await self._scan_smali_batches(apk_path, smali_dirs, patterns, case_sensitive)
+    
+    def _scan_pool(self) -> ProcessPoolExecutor:
+        """Worker pool for smali scanning, created on first use"""
+        if self._pool is None:
+            # The server runs threads, so avoid forking it; forkserver workers start clean
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            self._pool = ProcessPoolExecutor(max_workers=self._jobs,
+                                             mp_context=multiprocessing.get_context(method))
+        return self._pool
+    
+    async def _scan_smali_batches(self, apk_path: Path, smali_dirs: List[Path],
+                                  patterns: List[str], case_sensitive: bool) -> List[str]:
+        """Scan smali files in batches, stopping once enough matches are collected"""
+        files = itertools.chain.from_iterable(_iter_smali(str(d)) for d in smali_dirs)
+        chunks = iter(lambda: list(itertools.islice(files, SMALI_BATCH_SIZE)), [])
+        
+        # Keep a bounded window of batches in flight and consume them in order,
+        # so the walk and the scan both stop once enough matches are collected
+        loop = asyncio.get_running_loop()
+        pending = collections.deque()
         matches = []
-        search_pattern = pattern if case_sensitive else pattern.lower()
+        remaining = MAX_SMALI_MATCHES + 1
+        pool = self._scan_pool()
         
-        for smali_dir in smali_dirs:
-            for smali_file in smali_dir.rglob("*.smali"):
-                try:
-                    content = smali_file.read_text(encoding='utf-8')
-                    search_content = content if case_sensitive else content.lower()
-                    
-                    if search_pattern in search_content:
-                        # Find line numbers
-                        lines = content.split('\n')
-                        for i, line in enumerate(lines, 1):
-                            line_search = line if case_sensitive else line.lower()
-                            if search_pattern in line_search:
-                                matches.append(f"{smali_file.relative_to(apk_path)}:{i}: {line.strip()}")
-                except Exception as e:
-                    continue
+        def submit(count: int):
+            for chunk in itertools.islice(chunks, count):
+                pending.append(loop.run_in_executor(
+                    pool, _scan_files, chunk, str(apk_path), patterns, case_sensitive, remaining))
         
-        if not matches:
-            return f"Pattern '{pattern}' not found in smali code"
+        submit(self._jobs * 2)
+        try:
+            while pending and remaining > 0:
+                for relpath, i, line in (await pending.popleft())[:remaining]:
+                    matches.append(f"{relpath}:{i}: {line}")
+                remaining = MAX_SMALI_MATCHES + 1 - len(matches)
+                submit(1)
+        finally:
+            for future in pending:
+                future.cancel()
+        
+        return matches
+
+    async def _rg_smali_references(self, apk_path: Path, smali_dirs: List[Path],
+                                   patterns: List[str], case_sensitive: bool) -> List[str]:
+        """Search smali directories with ripgrep"""
+        cmd = [self._rg, "-n", "--no-heading", "--with-filename", "-F", "-uu", "-g", "*.smali"]
+        if not case_sensitive:
+            cmd.append("-i")
+        for pattern in patterns:
+            cmd.extend(["-e", pattern])
+        cmd.append("--")
+        cmd.extend(d.name for d in smali_dirs)
+        
+        # ripgrep exits with 1 when nothing matched, and with 2 when some files
+        # could not be read even though others matched
+        output = await self._run_command(cmd, cwd=apk_path, ok_returncodes=(0, 1, 2),
+                                         capture_all=True, max_lines=MAX_SMALI_MATCHES + 1)
+        
+        matches = []
+        for line in output.splitlines():
+            parts = line.split(':', 2)
+            if len(parts) == 3 and parts[1].isdigit():
+                relpath, i, text = parts
+                matches.append(f"{relpath}:{i}: {text.strip()}")
+        
+        # Without any stdout the command result is ripgrep's error output
+        if not matches and output.strip():
+            raise RuntimeError(f"ripgrep failed: {output.strip()}")
         
-        return f"Found {len(matches)} matches for '{pattern}':\n\n" + '\n'.join(matches[:50])
+        return matches
 
     async def _get_apk_info(self, apk_path: str) -> str:
         """Get basic APK information using aapt or alternative"""
         apk_file = Path(apk_path)
-        if not apk_file.exists():
-            raise FileNotFoundError(f"APK file not found: {apk_path}")
         
-        try:
-            # Try using aapt if available
-            cmd = ["aapt", "dump", "badging", str(apk_file)]
-            result = await self._run_command(cmd)
+        if self._aapt:
+            cmd = [self._aapt, "dump", "badging", str(apk_file)]
+            result = await self._run_command(cmd, capture_all=True)
             return f"APK Information:\n\n{result}"
-        except:
+        else:
             # Fallback to basic file information
             stat = apk_file.stat()
             return f"APK File Information:\n" \
@@ -571,6 +1149,12 @@ Include specific apktool commands and file locations to examine.
 
     async def run(self, transport_type: str = "stdio"):
         """Run the MCP server"""
+        # Finish the cleanup before serving so it cannot race a decode_apk call
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self._clean_work_dir)
+        except OSError as e:
+            logger.warning(f"Could not clean work directory {self.work_dir}: {e}")
+        
         if transport_type == "stdio":
             from mcp.server.stdio import stdio_server
             async with stdio_server() as (read_stream, write_stream):
@@ -582,27 +1166,61 @@ Include specific apktool commands and file locations to examine.
 # Server instance
 server_instance = None
 
-async def main():
-    """Main entry point for the MCP server"""
-    import sys
+async def _apktool_available(apktool_bin: Optional[str]) -> bool:
+    """Check that apktool runs, remembering a successful probe per binary"""
+    if not apktool_bin:
+        return False
+    
+    # Starting the JVM just to print a version is slow, so only do it once per install
+    stamp = CACHE_DIR / f"version-{_fingerprint(apktool_bin)}"
+    if stamp.exists():
+        return True
     
-    # Check if apktool is available
     try:
         process = await asyncio.create_subprocess_exec(
-            "apktool", "--version",
+            apktool_bin, "--version",
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE
         )
-        await process.communicate()
-        if process.returncode != 0:
-            raise FileNotFoundError()
-    except:
-        print("Warning: apktool not found in PATH. Please install apktool first.", file=sys.stderr)
-        print("Visit: https://ibotpeaches.github.io/Apktool/install/", file=sys.stderr)
+        stdout, _ = await process.communicate()
+    except OSError:
+        return False
+    
+    if process.returncode != 0:
+        return False
+    
+    try:
+        stamp.parent.mkdir(parents=True, exist_ok=True)
+        stamp.write_bytes(stdout)
+    except OSError as e:
+        logger.debug(f"Could not cache apktool probe: {e}")
+    
+    return True
+
+async def main():
+    """Main entry point for the MCP server"""
+    import argparse
+    import sys
+    
+    parser = argparse.ArgumentParser(description="Apktool MCP Server")
+    parser.add_argument("--jobs", "-j", type=int, default=None,
+                        help="Worker processes used for smali scanning (default: CPU count)")
+    parser.add_argument("--max-commands", type=int, default=None,
+                        help="Maximum concurrent apktool processes (default: half the CPU count)")
+    parser.add_argument("--cache-days", type=float, default=0,
+                        help="Remove decoded APKs not re-decoded for this many days on startup (default: never)")
+    args = parser.parse_args()
     
     # Create and run server
     global server_instance
-    server_instance = ApktoolMCPServer()
+    server_instance = ApktoolMCPServer(jobs=args.jobs, max_commands=args.max_commands,
+                                       cache_days=args.cache_days)
+    
+    # Check if apktool is available
+    if not await _apktool_available(server_instance._apktool_bin):
+        print("Warning: apktool not found in PATH. Please install apktool first.", file=sys.stderr)
+        print("Visit: https://ibotpeaches.github.io/Apktool/install/", file=sys.stderr)
+    
     await server_instance.run()
 
 if __name__ == "__main__":
@@ -0,0 +1,244 @@
+"""Tests for the server helpers that run without apktool installed"""
+
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("mcp")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import APktool
+from APktool import DECODE_MARKER, ApktoolMCPServer, _parse_range, _read_range, _scan_files
+
+
+def test_scan_files_stops_at_limit_mid_file(tmp_path):
+    # The limit is reached while the file still has unconsumed hits
+    smali = tmp_path / "smali" / "A.smali"
+    smali.parent.mkdir()
+    smali.write_text("".join(f".line {i}\n" for i in range(1, 201)))
+
+    results = _scan_files([str(smali)], str(tmp_path), [".line"], True, 5)
+
+    assert results == [("smali/A.smali", i, f".line {i}") for i in range(1, 6)]
+
+
+def test_scan_files_reports_each_line_once(tmp_path):
+    smali_dir = tmp_path / "smali"
+    smali_dir.mkdir()
+    (smali_dir / "Empty.smali").write_bytes(b"")
+    (smali_dir / "B.smali").write_text("const-string v0, \"key key\"\nnop\n  KEY\n")
+
+    results = _scan_files([str(smali_dir / "Empty.smali"), str(smali_dir / "B.smali")],
+                          str(tmp_path), ["key"], False)
+
+    assert results == [("smali/B.smali", 1, "const-string v0, \"key key\""),
+                       ("smali/B.smali", 3, "KEY")]
+
+
+MANIFEST = """<?xml version="1.0" encoding="utf-8"?>
+<manifest xmlns:android="http://schemas.android.com/apk/res/android" package="com.example.app">
+    <uses-permission android:name="android.permission.INTERNET"/>
+    <!-- <uses-permission android:name="android.permission.CAMERA"/> -->
+    <uses-permission-sdk-23
+        android:name="android.permission.READ_CONTACTS"/>
+    <application>
+        <activity
+            android:name=".MainActivity"
+            android:exported="true">
+            <intent-filter>
+                <action android:name="android.intent.action.MAIN"/>
+            </intent-filter>
+        </activity>
+        <service android:name=".SyncService"/>
+        <receiver android:name=".BootReceiver"/>
+    </application>
+</manifest>
+"""
+
+
+def test_parse_manifest_collects_names(tmp_path):
+    manifest_path = tmp_path / "AndroidManifest.xml"
+    manifest_path.write_text(MANIFEST)
+    server = ApktoolMCPServer(work_dir=tmp_path / "work")
+
+    manifest = server._parse_manifest(manifest_path)
+
+    # Multi-line tags are read, and the commented-out permission is not
+    assert manifest == {
+        "package": "com.example.app",
+        "permissions": ["android.permission.INTERNET", "android.permission.READ_CONTACTS"],
+        "activities": [".MainActivity"],
+        "services": [".SyncService"],
+        "receivers": [".BootReceiver"],
+    }
+
+
+def test_analyze_manifest_output(tmp_path):
+    apk_dir = tmp_path / "work" / "app"
+    apk_dir.mkdir(parents=True)
+    (apk_dir / "AndroidManifest.xml").write_text(MANIFEST)
+    server = ApktoolMCPServer(work_dir=tmp_path / "work")
+
+    result = asyncio.run(server._analyze_manifest(str(apk_dir)))
+
+    assert "Package: com.example.app\nActivity: .MainActivity\n" in result
+    assert "Permission: android.permission.CAMERA" not in result
+    assert result.endswith("Full manifest available at: apktool://apk/app/manifest")
+
+
+def test_parse_manifest_cache_invalidated_on_change(tmp_path):
+    manifest_path = tmp_path / "AndroidManifest.xml"
+    manifest_path.write_text(MANIFEST)
+    server = ApktoolMCPServer(work_dir=tmp_path / "work")
+
+    first = server._parse_manifest(manifest_path)
+    assert server._parse_manifest(manifest_path) is first
+
+    manifest_path.write_text(MANIFEST.replace("com.example.app", "com.example.other"))
+    assert server._parse_manifest(manifest_path)["package"] == "com.example.other"
+
+
+def test_parse_manifest_cache_evicts_least_recently_used(tmp_path, monkeypatch):
+    monkeypatch.setattr(APktool, "MANIFEST_CACHE_SIZE", 2)
+    server = ApktoolMCPServer(work_dir=tmp_path / "work")
+    paths = []
+    for name in ("a", "b", "c"):
+        path = tmp_path / f"{name}.xml"
+        path.write_text(MANIFEST)
+        paths.append(path.resolve())
+
+    server._parse_manifest(paths[0])
+    server._parse_manifest(paths[1])
+    server._parse_manifest(paths[0])
+    server._parse_manifest(paths[2])
+
+    assert list(server._manifest_cache) == [paths[0], paths[2]]
+
+
+def test_parse_manifest_rejects_binary_xml(tmp_path):
+    manifest_path = tmp_path / "AndroidManifest.xml"
+    manifest_path.write_bytes(b"\x03\x00\x08\x00binary")
+    server = ApktoolMCPServer(work_dir=tmp_path / "work")
+
+    with pytest.raises(ValueError, match="not decoded XML"):
+        server._parse_manifest(manifest_path)
+
+
+def test_decode_marker_unchanged_apk(tmp_path):
+    apk = tmp_path / "app.apk"
+    apk.write_bytes(b"PK" * 1000)
+    output_path = tmp_path / "work" / "app"
+    output_path.mkdir(parents=True)
+    server = ApktoolMCPServer(apktool_path=str(tmp_path / "missing-apktool"), work_dir=tmp_path / "work")
+    options = {"no_res": False, "no_src": False}
+
+    assert server._is_decoded(apk, output_path, options) is None
+    server._mark_decoded(apk, output_path, options)
+    assert server._is_decoded(apk, output_path, options) is True
+
+    # Skipped without launching apktool, which does not exist here
+    result = asyncio.run(server._decode_apk(str(apk)))
+    assert result.startswith("APK already decompiled to:")
+
+
+def test_decode_marker_rehashes_on_mtime_change(tmp_path):
+    apk = tmp_path / "app.apk"
+    apk.write_bytes(b"PK" * 1000)
+    output_path = tmp_path / "app"
+    output_path.mkdir()
+    server = ApktoolMCPServer(work_dir=tmp_path / "work")
+    options = {"no_res": False, "no_src": False}
+    server._mark_decoded(apk, output_path, options)
+
+    # Touched but identical: still decoded, and the marker picks up the new mtime
+    stat = apk.stat()
+    os.utime(apk, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert server._is_decoded(apk, output_path, options) is True
+    marker = json.loads((output_path / DECODE_MARKER).read_text())
+    assert marker["mtime_ns"] == apk.stat().st_mtime_ns
+
+    # Same size, different content
+    apk.write_bytes(b"KP" * 1000)
+    assert server._is_decoded(apk, output_path, options) is False
+
+
+def test_decode_marker_options_mismatch(tmp_path):
+    apk = tmp_path / "app.apk"
+    apk.write_bytes(b"PK" * 1000)
+    output_path = tmp_path / "app"
+    output_path.mkdir()
+    server = ApktoolMCPServer(work_dir=tmp_path / "work")
+    server._mark_decoded(apk, output_path, {"no_res": False, "no_src": False})
+
+    assert server._is_decoded(apk, output_path, {"no_res": True, "no_src": False}) is False
+
+
+def test_decode_outdated_marker_requires_force(tmp_path):
+    apk = tmp_path / "app.apk"
+    apk.write_bytes(b"PK" * 1000)
+    output_path = tmp_path / "work" / "app"
+    output_path.mkdir(parents=True)
+    server = ApktoolMCPServer(apktool_path=str(tmp_path / "missing-apktool"), work_dir=tmp_path / "work")
+    server._mark_decoded(apk, output_path, {"no_res": False, "no_src": False})
+    apk.write_bytes(b"PK" * 2000)
+
+    with pytest.raises(FileExistsError, match="pass force=True"):
+        asyncio.run(server._decode_apk(str(apk)))
+
+
+def test_parse_range():
+    assert _parse_range("") == (0, None)
+    assert _parse_range("offset=10") == (10, None)
+    assert _parse_range("offset=10&length=0") == (10, 0)
+    with pytest.raises(ValueError, match="non-negative"):
+        _parse_range("offset=-1")
+    with pytest.raises(ValueError, match="non-negative"):
+        _parse_range("length=-5")
+
+
+@pytest.mark.parametrize("size", [100, APktool.MMAP_MIN_SIZE * 2])
+def test_read_range(tmp_path, size):
+    # Small files are read whole, large ones through a memory map
+    path = tmp_path / "strings.xml"
+    data = bytes(ord("a") + i % 26 for i in range(size))
+    path.write_bytes(data)
+
+    assert asyncio.run(_read_range(path)) == data.decode()
+    assert asyncio.run(_read_range(path, 30, 20)) == data[30:50].decode()
+    assert asyncio.run(_read_range(path, size - 5)) == data[-5:].decode()
+    assert asyncio.run(_read_range(path, size + 10, 5)) == ""
+
+
+def _read_stream(data, **kwargs):
+    async def read():
+        stream = asyncio.StreamReader()
+        stream.feed_data(data)
+        stream.feed_eof()
+        return await ApktoolMCPServer._read_stream(stream, **kwargs)
+    return asyncio.run(read())
+
+
+def test_read_stream_keeps_tail():
+    data = b"".join(b"line %d\n" % i for i in range(20000))
+    assert len(data) > APktool.MAX_OUTPUT_TAIL
+
+    output = _read_stream(data)
+
+    assert output.startswith("... (output truncated)\n")
+    assert output.endswith("line 19999\n")
+    assert len(output) <= APktool.MAX_OUTPUT_TAIL + len("... (output truncated)\n")
+    assert _read_stream(data, capture_all=True) == data.decode()
+
+
+def test_read_stream_stops_at_max_lines():
+    stopped = []
+    data = b"".join(b"match %d\n" % i for i in range(100))
+
+    output = _read_stream(data, capture_all=True, max_lines=3, on_limit=lambda: stopped.append(True))
+
+    assert output == "match 0\nmatch 1\nmatch 2"
+    assert stopped == [True]